@@ -3,4 +3,4 @@ from fusetree.types import Bytes_Like, Stat_Like, StatVFS_Like, Node_Like, FileH
 from fusetree.core import Node, DirHandle, FileHandle
 from fusetree.fusetree import FuseTree
 
-from fusetree.nodetypes import BaseSymlink, BaseFile, BaseDir, Symlink, BlobFile, GeneratorFile, generatorfile, HttpFile, DictDir
+from fusetree.nodetypes import BaseSymlink, BaseFile, BaseDir, Symlink, BlobFile, GeneratorFile, generatorfile, LocalFile, HttpFile, DictDir, FrozenDictDir
@@ -11,6 +11,22 @@ import traceback
 from . import util
 from .types import *
 
+# Raised by every unimplemented or forbidden operation, so build them only once.
+_ENOSYS = fuse.FuseOSError(errno.ENOSYS)
+_EPERM = fuse.FuseOSError(errno.EPERM)
+
+def _raise_shared(error: OSError) -> None:
+    """
+    Raise one of the shared errors above.
+
+    Whatever the previous raise attached to it is dropped first: Otherwise the
+    traceback would keep growing, and a stale `__context__` (with its frames) would
+    survive any later raise that doesn't happen while handling another exception.
+    """
+    error.__traceback__ = None
+    error.__context__ = None
+    raise error from None
+
 class Node:
     """
     A node is the superclass of every entry in your filesystem.
@@ -31,6 +47,8 @@ class Node:
     Common implementations to several common node types are provided on `nodetypes`.
     """
 
+    __slots__ = ()
+
     @property
     def attr_timeout(self):
         return 1
@@ -39,6 +57,15 @@ class Node:
     def entry_timeout(self):
         return 1
 
+    @property
+    def negative_timeout(self):
+        """
+        For how long a failed `lookup()` on this directory may be remembered.
+
+        Defaults to 0, since most directories can't guarantee the entry won't show up.
+        """
+        return 0
+
     async def remember(self) -> None:
         """
         Hint that this node has been added to the kernel cache.
@@ -71,7 +98,7 @@ class Node:
         but libfuse and the kernel will still assign a different
         inode for internal use (called the "nodeid").
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def setattr(self, new_attr: Stat, to_set: List[str]) -> Stat_Like:
         cur_attr = await self.getattr()
@@ -95,32 +122,32 @@ class Node:
         """
         Change the permission bits of a file
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def chown(self, uid: int, gid: int) -> None:
         """
         Change the owner and group of a file.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def truncate(self, length: int) -> None:
         """
         Change the size of a file
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def utimens(self, atime: float, mtime: float) -> None:
         """
         Change the access and modification times of a file with
         nanosecond resolution
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def readlink(self) -> str:
         """
         Read the target of a symbolic link
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def mknod(self, name: str, mode: int, dev: int) -> Node_Like:
         """
@@ -130,7 +157,7 @@ class Node:
         nodes.  If the filesystem defines a create() method, then for
         regular files that will be called instead.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def mkdir(self, name: str, mode: int) -> Node_Like:
         """
@@ -140,37 +167,37 @@ class Node:
         bits set, i.e. S_ISDIR(mode) can be false.  To obtain the
         correct directory type bits use  mode|S_IFDIR
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def unlink(self, name: str) -> None:
         """
         Remove a file
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def rmdir(self, name: str) -> None:
         """
         Remove a directory
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def symlink(self, name: str, target: str) -> Node_Like:
         """
         Create a symbolic link
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def rename(self, old_name: str, new_parent: 'Node', new_name: str) -> None:
         """
         Rename a file
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def link(self, name: str, node: 'Node') -> Node_Like:
         """
         Create a hard link to a file
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def open(self, mode: int) -> 'FileHandle':
         """
@@ -189,31 +216,31 @@ class Node:
         filehandle in the fuse_file_info structure, which will be
         passed to all file operations.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def setxattr(self, name: str, value: bytes, flags: int) -> None:
         """
         Set extended attributes
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def getxattr(self, name: str) -> bytes:
         """
         Get extended attributes
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def listxattr(self) -> Iterable[str]:
         """
         List extended attributes
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def removexattr(self, name: str) -> None:
         """
         Remove extended attributes
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def opendir(self) -> DirHandle_Like:
         """
@@ -225,7 +252,7 @@ class Node:
         filehandle in the fuse_file_info structure, which will be
         passed to readdir, closedir and fsyncdir.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def statfs(self) -> StatVFS:
         """
@@ -233,7 +260,7 @@ class Node:
 
         The 'f_favail', 'f_fsid' and 'f_flag' fields are ignored
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
 
     async def access(self, amode: int) -> None:
@@ -253,7 +280,7 @@ class Node:
         Like open, but called on O_CREAT.  Never called on Linux before 2.6.15.
         See also: mknod() and open()
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
 
 
@@ -267,6 +294,10 @@ class DirHandle:
     of the file names on `opendir` and a new DirHandle will be created automatically
     """
 
+    __slots__ = ('node',)
+
+    supports_readdirplus = False
+
     def __init__(self, node: Node = None) -> None:
         self.node = node
 
@@ -274,7 +305,19 @@ class DirHandle:
         """
         Read directory
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
+
+    async def readdirplus(self) -> Iterable[Tuple[str, Node_Like, Optional[Stat_Like]]]:
+        """
+        Read directory, returning `(name, node, stat)` for each entry
+
+        This saves a `lookup()` per entry when listing the directory.
+        `stat` may be None if it isn't readily available, in which case
+        it is fetched with `getattr()`.
+
+        Only used if `supports_readdirplus` is set.
+        """
+        _raise_shared(_ENOSYS)
 
     async def fsyncdir(self, datasync: int) -> None:
         """
@@ -283,7 +326,7 @@ class DirHandle:
         If the datasync parameter is non-zero, then only the user data
         should be flushed, not the meta data
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def releasedir(self) -> None:
         """
@@ -303,6 +346,8 @@ class FileHandle:
     and a FileHandle will be created automatically -- Otherwise, check the many common implementation in `nodetypes`
     """
 
+    __slots__ = ('node', 'direct_io', 'nonseekable')
+
     def __init__(self, node: Node = None, direct_io: bool = False, nonseekable: bool = False) -> None:
         self.node = node
         self.direct_io = direct_io
@@ -318,7 +363,7 @@ class FileHandle:
         but libfuse and the kernel will still assign a different
         inode for internal use (called the "nodeid").
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def setattr(self, new_attr: Stat, to_set: List[str]) -> Stat_Like:
         cur_attr = await self.getattr()
@@ -342,26 +387,26 @@ class FileHandle:
         """
         Change the permission bits of an open file.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def chown(self, uid: int, gid: int) -> None:
         """
         Change the owner and group of an open file.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def truncate(self, length: int) -> None:
         """
         Change the size of an open file.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def utimens(self, atime: float, mtime: float) -> None:
         """
         Change the access and modification times of a file with
         nanosecond resolution
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def read(self, size: int, offset: int) -> bytes:
         """
@@ -374,7 +419,7 @@ class FileHandle:
         value of the read system call will reflect the return value of
         this operation.
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def write(self, data: bytes, offset: int) -> int:
         """
@@ -384,7 +429,7 @@ class FileHandle:
         except on error. An exception to this is when the 'direct_io'
         mount option is specified (see read operation).
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
     async def flush(self) -> None:
         """
@@ -476,5 +521,5 @@ class FileHandle:
 
         FIXME: fusepy doesn't seem to support it properly
         """
-        raise fuse.FuseOSError(errno.ENOSYS)
+        _raise_shared(_ENOSYS)
 
@@ -2,6 +2,7 @@ import fusell
 from fusell import fuse_file_info
 from fuse import FuseOSError
 from typing import Dict, Iterable, Tuple, Optional, Any
+from collections import OrderedDict
 
 import logging
 import errno
@@ -12,7 +13,7 @@ import ctypes
 import threading
 import time
 
-from .util import LoggingFuseOperations
+from .util import LoggingFuseOperations, clear_exception
 from .types import *
 from .core import *
 from .types_conv import *
@@ -37,7 +38,7 @@ def copy_struct(struct):
 
 
 class FuseTree(fusell.FUSELL):
-    def __init__(self, rootNode: Node_Like, mountpoint, log=True, encoding='utf-8', loop=None, **kwargs) -> None:
+    def __init__(self, rootNode: Node_Like, mountpoint, log=True, encoding='utf-8', loop=None, lookup_cache_size=4096, **kwargs) -> None:
         self.rootNode = as_node(rootNode)
 
         self._req_seq_lock = asyncio.Lock()
@@ -56,6 +57,13 @@ class FuseTree(fusell.FUSELL):
         self._node_like_to_node: Dict[int, Any] = {}
         self._node_to_node_like: Dict[int, Any] = {}
 
+        #Recently resolved lookups: (parent_ino, name) -> (parent, child, expiration)
+        #The child is kept as returned by `lookup()`, so it still goes through `_as_node()` on every hit
+        #A child of None is a negative entry, remembering that the name doesn't exist
+        #Holding a reference to the parent keeps its inode number (its id) from being recycled
+        self._lookup_cache: OrderedDict[Tuple[int, bytes], Tuple[Node, Optional[Node_Like], float]] = OrderedDict()
+        self._lookup_cache_size = lookup_cache_size
+
         super().__init__(mountpoint, encoding=encoding)
 
     async def _as_node(self, node: Node_Like) -> Node:
@@ -103,7 +111,7 @@ class FuseTree(fusell.FUSELL):
                         del self._inodes_refs[ino]
                         del self._inodes[ino]
 
-                        node_like = self._node_to_node_like[id(node)]
+                        node_like = self._node_to_node_like.get(id(node), None)
                         if node_like is not None:
                             del self._node_to_node_like[id(node)]
                             del self._node_like_to_node[id(node_like)]
@@ -116,6 +124,37 @@ class FuseTree(fusell.FUSELL):
 
 
 
+    def _cached_lookup(self, parent_ino: int, parent: Node, name: bytes) -> Tuple[bool, Optional[Node_Like]]:
+        """
+        Returns `(found, child)`, where child is None for a cached negative lookup
+        """
+        key = (parent_ino, name)
+        cached = self._lookup_cache.get(key, None)
+        if cached is None:
+            return False, None
+
+        cached_parent, child, expiration = cached
+        if cached_parent is not parent or expiration < time.monotonic():
+            del self._lookup_cache[key]
+            return False, None
+
+        self._lookup_cache.move_to_end(key)
+        return True, child
+
+    def _cache_lookup(self, parent_ino: int, parent: Node, name: bytes, child: Optional[Node_Like], timeout: float) -> None:
+        if self._lookup_cache_size <= 0 or timeout <= 0:
+            return
+
+        key = (parent_ino, name)
+        self._lookup_cache.pop(key, None)
+        self._lookup_cache[key] = (parent, child, time.monotonic() + timeout)
+        while len(self._lookup_cache) > self._lookup_cache_size:
+            self._lookup_cache.popitem(last=False)
+
+    def _invalidate_lookup(self, parent_ino: int, name: bytes) -> None:
+        self._lookup_cache.pop((parent_ino, name), None)
+
+
     async def _reply_err(self, req, err: int) -> (int, str):
         self.reply_err(req, err)
         if err == 0:
@@ -187,6 +226,7 @@ class FuseTree(fusell.FUSELL):
             except OSError as e:
                 #traceback.print_exc()
                 result = await self._reply_err(req, e.errno)
+                clear_exception(e)
             except Exception as e:
                 traceback.print_exc()
                 await self._reply_err(req, errno.EFAULT)
@@ -248,6 +288,7 @@ class FuseTree(fusell.FUSELL):
                 self._inodes_refs.clear()
                 self._node_like_to_node.clear()
                 self._node_to_node_like.clear()
+                self._lookup_cache.clear()
 
         asyncio.run_coroutine_threadsafe(forget_all(), self._loop).result()
 
@@ -264,10 +305,20 @@ class FuseTree(fusell.FUSELL):
     @_wrapper
     async def fuse_lookup(self, req, parent_ino, name):
         parent = await self._ino_to_node(parent_ino)
-        _child = await parent.lookup(name.decode(self.encoding))
+        found, _child = self._cached_lookup(parent_ino, parent, name)
+        if not found:
+            _child = await parent.lookup(name.decode(self.encoding))
+            if _child is None:
+                self._cache_lookup(parent_ino, parent, name, None, parent.negative_timeout)
+        if _child is None:
+            raise FuseOSError(errno.ENOENT)
+
+        # Always convert, since the converted node may have been forgotten in the meantime
         child = await self._as_node(_child)
         if child is not _child:
             print(f'Converted child {name} for {type(_child)} to {type(child)}')
+        if not found:
+            self._cache_lookup(parent_ino, parent, name, _child, child.entry_timeout)
 
         return await self._reply_entry(req, child)
 
@@ -306,6 +357,7 @@ class FuseTree(fusell.FUSELL):
                 # Ignore not-implemented -- We will fallback to the same operation on the node
                 if e.errno != errno.ENOSYS:
                     raise
+                clear_exception(e)
 
         attr = as_stat(await node.getattr())
         return await self._reply_attr(req, attr, ino, node.attr_timeout)
@@ -332,6 +384,7 @@ class FuseTree(fusell.FUSELL):
                 # Ignore not-implemented -- We will fallback to the same operation on the node
                 if e.errno != errno.ENOSYS:
                     raise
+                clear_exception(e)
 
         # send setattr to the Node
         new_attr = as_stat(await node.setattr(attr, to_set))
@@ -348,14 +401,18 @@ class FuseTree(fusell.FUSELL):
     @_wrapper
     async def fuse_mknod(self, req, parent_ino, name, mode, rdev):
         parent = await self._ino_to_node(parent_ino)
-        new_node = await self._as_node(await parent.mknod(name.decode(self.encoding), mode, rdev))
+        new_node = await parent.mknod(name.decode(self.encoding), mode, rdev)
+        self._invalidate_lookup(parent_ino, name)
+        new_node = await self._as_node(new_node)
 
         return await self._reply_entry(req, new_node)
 
     @_wrapper
     async def fuse_mkdir(self, req, parent_ino, name, mode):
         parent = await self._ino_to_node(parent_ino)
-        new_dir = await self._as_node(await parent.mkdir(name.decode(self.encoding), mode))
+        new_dir = await parent.mkdir(name.decode(self.encoding), mode)
+        self._invalidate_lookup(parent_ino, name)
+        new_dir = await self._as_node(new_dir)
 
         return await self._reply_entry(req, new_dir)
 
@@ -363,6 +420,7 @@ class FuseTree(fusell.FUSELL):
     async def fuse_unlink(self, req, parent_ino, name):
         parent = await self._ino_to_node(parent_ino)
         await parent.unlink(name.decode(self.encoding))
+        self._invalidate_lookup(parent_ino, name)
 
         return await self._reply_err(req, 0)
 
@@ -370,6 +428,7 @@ class FuseTree(fusell.FUSELL):
     async def fuse_rmdir(self, req, parent_ino, name):
         parent = await self._ino_to_node(parent_ino)
         await parent.rmdir(name.decode(self.encoding))
+        self._invalidate_lookup(parent_ino, name)
 
         return await self._reply_err(req, 0)
 
@@ -377,6 +436,7 @@ class FuseTree(fusell.FUSELL):
     async def fuse_symlink(self, req, link, parent_ino, name):
         parent = await self._ino_to_node(parent_ino)
         new_symlink = await parent.symlink(name.decode(self.encoding), link.decode(self.encoding))
+        self._invalidate_lookup(parent_ino, name)
 
         return await self._reply_entry(req, new_symlink)
 
@@ -384,7 +444,9 @@ class FuseTree(fusell.FUSELL):
     async def fuse_rename(self, req, old_parent_ino, name, new_parent_ino, new_name):
         old_parent = await self._ino_to_node(old_parent_ino)
         new_parent = await self._ino_to_node(new_parent_ino)
-        await old_parent.rename(name, new_parent, new_name)
+        await old_parent.rename(name.decode(self.encoding), new_parent, new_name.decode(self.encoding))
+        self._invalidate_lookup(old_parent_ino, name)
+        self._invalidate_lookup(new_parent_ino, new_name)
 
         return await self._reply_err(req, 0)
 
@@ -392,7 +454,9 @@ class FuseTree(fusell.FUSELL):
     async def fuse_link(self, req, ino, new_parent_ino, new_name):
         node = await self._ino_to_node(ino)
         new_parent = await self._ino_to_node(new_parent_ino)
-        new_link = await self._as_node(await new_parent.link(ino, new_name))
+        new_link = await new_parent.link(ino, new_name)
+        self._invalidate_lookup(new_parent_ino, new_name)
+        new_link = await self._as_node(new_link)
 
         return await self._reply_entry(req, new_link)
 
@@ -494,18 +558,13 @@ class FuseTree(fusell.FUSELL):
         entry_names = []
 
         #TODO: Increase concurrency
-        async for entry in dirhandle.readdir():
-            if isinstance(entry, str):
-                child_name = entry
-                child = await node.lookup(child_name)
-            else:
-                child_name, child = entry
-
+        async for child_name, child, child_stat in self._readdirplus(node, dirhandle):
             child = await self._as_node(child)
 
             child_ino = await self._node_to_ino(child)
-            child_stat = as_stat(await child.getattr())
-            child_stat = child_stat.with_values(st_ino=child_ino)
+            if child_stat is None:
+                child_stat = await child.getattr()
+            child_stat = as_stat(child_stat).with_values(st_ino=child_ino)
 
             entries.append((child_name, child_stat.as_dict()))
             entry_names.append(child_name)
@@ -513,6 +572,24 @@ class FuseTree(fusell.FUSELL):
         self.reply_readdir(req, size, off, entries)
         return entry_names
 
+    async def _readdirplus(self, node: Node, dirhandle: DirHandle):
+        """
+        Yields `(name, node, stat)` for every entry of `dirhandle`,
+        using `readdirplus()` when the handle supports it
+        """
+        if dirhandle.supports_readdirplus:
+            async for entry in dirhandle.readdirplus():
+                yield entry
+            return
+
+        async for entry in dirhandle.readdir():
+            if isinstance(entry, str):
+                child_name = entry
+                child = await node.lookup(child_name)
+            else:
+                child_name, child = entry
+            yield child_name, child, None
+
     @_wrapper
     async def fuse_releasedir(self, req, ino, fi):
         async with self._handle_lock:
@@ -1,45 +1,77 @@
 from stat import S_IFDIR, S_IFLNK, S_IFREG
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Optional, Tuple
 import aiohttp
-from io import BytesIO
+import asyncio
+import functools
 
 import os
 
 from .types import *
 from .core import *
+from .core import _ENOSYS, _EPERM, _raise_shared
 from . import types_conv
 
+# Stat is immutable, so nodes with the same type and mode can share it
+_STAT_CACHE: Dict[Tuple[int, int], Stat] = {}
+
+def _stat_for(kind: int, mode: int) -> Stat:
+    key = (kind, mode)
+    stat = _STAT_CACHE.get(key, None)
+    if stat is None:
+        stat = _STAT_CACHE[key] = Stat(st_mode=kind | mode)
+    return stat
+
+def _mode_property(kind: int) -> property:
+    # Assigning `mode` (e.g., from an overridden chmod()) also refreshes the cached Stat
+    def get_mode(self) -> int:
+        return self._mode
+
+    def set_mode(self, mode: int) -> None:
+        self._mode = mode & 0o777
+        self._stat = _stat_for(kind, self._mode)
+
+    return property(get_mode, set_mode)
+
+
 class BaseFile(Node):
+    __slots__ = ('_mode', '_stat')
+
+    mode = _mode_property(S_IFREG)
+
     def __init__(self, mode: int = 0o444) -> None:
-        self.mode = mode & 0o777
+        self.mode = mode
 
     async def getattr(self) -> Stat:
-        return Stat(
-            st_mode=S_IFREG | self.mode
-        )
+        return self._stat
 
 
 class BaseDir(Node):
+    __slots__ = ('_mode', '_stat')
+
+    mode = _mode_property(S_IFDIR)
+
     def __init__(self, mode: int = 0o555) -> None:
-        self.mode = mode & 0o777
+        self.mode = mode
 
     async def getattr(self) -> Stat:
-        return Stat(
-            st_mode=S_IFDIR | self.mode
-        )
+        return self._stat
 
 
 class BaseSymlink(Node):
+    __slots__ = ('_mode', '_stat')
+
+    mode = _mode_property(S_IFLNK)
+
     def __init__(self, mode: int = 0o444) -> None:
-        self.mode = mode & 0o777
+        self.mode = mode
 
     async def getattr(self) -> Stat:
-        return Stat(
-            st_mode=S_IFLNK | self.mode
-        )
+        return self._stat
 
 
 class Symlink(BaseSymlink):
+    __slots__ = ('link',)
+
     def __init__(self, link: str, mode: int = 0o444) -> None:
         super().__init__(mode)
         self.link = link
@@ -50,6 +82,8 @@ class Symlink(BaseSymlink):
 
 
 class BlobFile(BaseFile):
+    __slots__ = ('rw', 'data', 'shared_handle')
+
     def __init__(self, data: bytes = b'', mode: int = None, rw: bool = False) -> None:
         super().__init__(mode if mode is not None else 0o666 if rw else 0o444)
         self.rw = rw
@@ -70,52 +104,57 @@ class BlobFile(BaseFile):
 
     async def getattr(self) -> Stat:
         if self.shared_handle is not None:
-            size = len(self.shared_handle.buffer.getvalue())
+            size = len(self.shared_handle.buffer)
         else:
-            size=len(self.data)
+            size = len(self.data)
 
-        return Stat(
-            st_mode=S_IFREG | self.mode,
-            st_size=size
-        )
+        return self._stat._replace(st_size=size)
 
     async def truncate(self, size: int) -> None:
-        handle = await self.open(os.O_RDWR)
-        try:
-            await handle.truncate(size)
-        finally:
-            await handle.release()
+        if not self.rw:
+            _raise_shared(_EPERM)
+
+        if self.shared_handle is not None:
+            await self.shared_handle.truncate(size)
+        else:
+            data = await self.load()
+            await self.save(data[:size].ljust(size, b'\x00'))
 
     class Handle(FileHandle):
+        __slots__ = ('buffer', 'dirty', 'refs')
+
         def __init__(self, node: Node, data: bytes) -> None:
             super().__init__(node)
-            self.buffer = BytesIO(data)
+            self.buffer = bytearray(data)
             self.dirty = False
             self.refs = 0
 
         async def read(self, size: int, offset: int) -> bytes:
-            self.buffer.seek(offset)
-            return self.buffer.read(size)
+            return bytes(memoryview(self.buffer)[offset : offset + size])
 
         async def write(self, buffer, offset):
             if not self.node.rw:
-                raise fuse.FuseOSError(errno.EPERM)
+                _raise_shared(_EPERM)
 
             self.dirty = True
-            self.buffer.seek(offset)
-            self.buffer.write(buffer)
+            if offset > len(self.buffer):
+                self.buffer.extend(bytes(offset - len(self.buffer)))
+            self.buffer[offset : offset + len(buffer)] = buffer
             return len(buffer)
 
         async def truncate(self, size: int) -> None:
             if not self.node.rw:
-                raise fuse.FuseOSError(errno.EPERM)
+                _raise_shared(_EPERM)
 
             self.dirty = True
-            self.buffer.truncate(size)
+            if size < len(self.buffer):
+                del self.buffer[size:]
+            else:
+                self.buffer.extend(bytes(size - len(self.buffer)))
 
         async def flush(self) -> None:
             if self.dirty:
-                await self.node.save(self.buffer.getvalue())
+                await self.node.save(bytes(self.buffer))
                 self.dirty = None
 
         async def release(self) -> None:
@@ -129,6 +168,8 @@ class BlobFile(BaseFile):
 
 
 class GeneratorFile(BaseFile):
+    __slots__ = ('generator', 'min_read_len')
+
     def __init__(self, generator: Iterable[Bytes_Like], mode: int = 0o444, min_read_len: int = -1) -> None:
         super().__init__(mode)
         self.generator = generator
@@ -138,6 +179,8 @@ class GeneratorFile(BaseFile):
         return GeneratorFile.Handle(self, self.generator, self.min_read_len)
 
     class Handle(FileHandle):
+        __slots__ = ('generator', 'current_blob', 'current_blob_position', 'min_read_len')
+
         def __init__(self, node: Node, generator: Iterable[Bytes_Like], min_read_len: int = -1) -> None:
             super().__init__(node, direct_io=True, nonseekable=True)
 
@@ -147,13 +190,16 @@ class GeneratorFile(BaseFile):
             self.min_read_len = min_read_len
 
         async def read(self, size: int, offset: int) -> bytes:
-            ret = b''
-            while size > len(ret) and self.current_blob is not None:
-                n = min(size - len(ret), len(self.current_blob) - self.current_blob_position)
+            # Collect views over the generated blobs and copy them only once, at the end
+            chunks = []
+            total = 0
+            while size > total and self.current_blob is not None:
+                n = min(size - total, len(self.current_blob) - self.current_blob_position)
 
                 if n > 0:
-                    ret += self.current_blob[self.current_blob_position : self.current_blob_position + n]
+                    chunks.append(memoryview(self.current_blob)[self.current_blob_position : self.current_blob_position + n])
                     self.current_blob_position += n
+                    total += n
                 else:
                     try:
                         self.current_blob = types_conv.as_bytes(await self.generator.__anext__())
@@ -161,9 +207,9 @@ class GeneratorFile(BaseFile):
                         self.current_blob = None
                     self.current_blob_position = 0
 
-                if self.min_read_len > 0 and len(ret) >= self.min_read_len:
+                if self.min_read_len > 0 and total >= self.min_read_len:
                     break
-            return ret
+            return b''.join(chunks)
 
         def as_generator(self, generator):
             async def as_async_gen(data):
@@ -183,51 +229,161 @@ class GeneratorFile(BaseFile):
 
             raise TypeError('Expected iterator, iterable, async iterator, async iterable or callable')
 
-def generatorfile(func, async=None):
+def generatorfile(func):
     def tmp(*args, **kwargs):
-        return GeneratorFile(lambda: func(*args, **kwargs))
+        return GeneratorFile(functools.partial(func, *args, **kwargs))
     return tmp
 
 
+class LocalFile(BaseFile):
+    __slots__ = ('path',)
+
+    def __init__(self, path: str, mode: int = 0o444) -> None:
+        super().__init__(mode)
+        self.path = path
+
+    async def getattr(self) -> Stat:
+        st = await asyncio.get_event_loop().run_in_executor(None, os.stat, self.path)
+        return self._stat._replace(st_size=st.st_size)
+
+    async def open(self, mode: int) -> FileHandle:
+        if mode & os.O_ACCMODE != os.O_RDONLY:
+            raise fuse.FuseOSError(errno.EACCES)
+
+        fd = await asyncio.get_event_loop().run_in_executor(None, os.open, self.path, os.O_RDONLY)
+        return LocalFile.Handle(self, fd)
+
+    class Handle(FileHandle):
+        __slots__ = ('fd',)
+
+        def __init__(self, node: Node, fd: int) -> None:
+            super().__init__(node)
+            self.fd = fd
+
+        async def getattr(self) -> Stat:
+            st = await asyncio.get_event_loop().run_in_executor(None, os.fstat, self.fd)
+            return self.node._stat._replace(st_size=st.st_size)
+
+        async def read(self, size: int, offset: int) -> bytes:
+            # Disk (or network filesystem) reads would otherwise stall every other request
+            return await asyncio.get_event_loop().run_in_executor(None, os.pread, self.fd, size, offset)
+
+        async def release(self) -> None:
+            os.close(self.fd)
+
+
 class HttpFile(BaseFile):
+    __slots__ = ('url',)
+
     def __init__(self, url: str, mode: int = 0o444) -> None:
         super().__init__(mode)
         self.url = url
 
     async def open(self, mode: int) -> FileHandle:
         session = await aiohttp.ClientSession().__aenter__()
-        response = await (await session.get(self.url)).__aenter__()
-        return HttpFile.Handle(self, session, response)
+        return HttpFile.Handle(self, session)
 
     class Handle(FileHandle):
-        def __init__(self, node: Node, session, response) -> None:
-            super().__init__(node, direct_io=True, nonseekable=True)
+        __slots__ = ('session', 'response', 'position', 'ranges', 'body')
+
+        def __init__(self, node: Node, session) -> None:
+            super().__init__(node, direct_io=True)
             self.session = session
-            self.response = response
+            # The response being streamed, and how far it has been read
+            self.response = None
+            self.position = 0
+            # Whether the server honours Range requests -- Until it proves otherwise
+            self.ranges = True
+            # The whole file, once the server has ignored a Range request and we had to seek
+            self.body = None
 
         async def read(self, size: int, offset: int) -> bytes:
-            return await self.response.content.read(size)
+            try:
+                # Sequential reads keep streaming the same response, only seeks need a new request
+                if self.body is None and (self.response is None or offset != self.position):
+                    await self.request(offset)
+
+                if self.body is not None:
+                    return self.body[offset : offset + size]
+                if self.response is None:
+                    return b''
+
+                chunks = []
+                total = 0
+                while total < size:
+                    chunk = await self.response.content.read(size - total)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    total += len(chunk)
+            except aiohttp.ClientError:
+                raise fuse.FuseOSError(errno.EIO)
+
+            self.position += total
+            return b''.join(chunks)
+
+        async def request(self, offset: int) -> None:
+            self.close_response()
+
+            # Ranges apply to the encoded content, so make sure there is no encoding
+            headers = {'Accept-Encoding': 'identity'}
+            if self.ranges:
+                headers['Range'] = f'bytes={offset}-'
+
+            response = await self.session.get(self.node.url, headers=headers)
+            if response.status == 416:  # Range Not Satisfiable, i.e., reading past the end
+                response.close()
+                return
+            response.raise_for_status()
+
+            if response.status != 206:
+                self.ranges = False
+                if offset != 0:
+                    # The server ignored the range and sent the whole thing:
+                    # Keep it, instead of downloading it again on every seek
+                    self.body = await response.read()
+                    response.close()
+                    return
+
+            self.response = response
+            self.position = offset
+
+        def close_response(self) -> None:
+            if self.response is not None:
+                self.response.close()
+                self.response = None
 
         async def release(self) -> None:
-            await self.response.__aexit__(None, None, None)
+            self.close_response()
             await self.session.__aexit__(None, None, None)
 
 
 class DictDir(BaseDir):
+    __slots__ = ('rw', 'contents')
+
     def __init__(self, contents: Dict[str, Node_Like], mode: int = None, rw: bool = False) -> None:
         super().__init__(mode if mode is not None else 0o777 if rw else 0o555)
         self.rw = rw
         self.contents = contents
 
+    @property
+    def negative_timeout(self):
+        # Missing entries can only show up later on writable directories
+        return 0 if self.rw else self.entry_timeout
+
     # ====== RO operations ======
 
     async def lookup(self, name: str) -> Node_Like:
         return self.contents.get(name, None)
 
     async def opendir(self) -> DirHandle_Like:
-        return DictDir.Handle(self, self.contents.keys())
+        return DictDir.Handle(self, list(self.contents.items()))
 
     class Handle(DirHandle):
+        __slots__ = ('items',)
+
+        supports_readdirplus = True
+
         def __init__(self, node: Node, items: Iterable[DirEntry]) -> None:
             super().__init__(node)
             self.items = items
@@ -236,14 +392,24 @@ class DictDir(BaseDir):
             for item in self.items:
                 yield item
 
+        async def readdirplus(self) -> Iterable[Tuple[str, Node_Like, Optional[Stat_Like]]]:
+            for item in self.items:
+                if isinstance(item, str):
+                    name, child = item, await self.node.lookup(item)
+                else:
+                    name, child = item
+
+                stat = await child.getattr() if isinstance(child, Node) else None
+                yield name, child, stat
+
     # ====== RW operations ======
 
     async def mknod(self, name: str, mode: int, dev: int) -> Node_Like:
         if not self.rw:
-            raise fuse.FuseOSError(errno.EPERM)
+            _raise_shared(_EPERM)
 
         if dev != 0:
-            raise fuse.FuseOSError(errno.ENOSYS)
+            _raise_shared(_ENOSYS)
 
         new_file = BlobFile(b'', mode, rw=True)
         self.contents[name] = new_file
@@ -251,7 +417,7 @@ class DictDir(BaseDir):
 
     async def mkdir(self, name: str, mode: int) -> Node_Like:
         if not self.rw:
-            raise fuse.FuseOSError(errno.EPERM)
+            _raise_shared(_EPERM)
 
         new_dir = DictDir({}, mode, rw=True)
         self.contents[name] = new_dir
@@ -259,33 +425,100 @@ class DictDir(BaseDir):
 
     async def unlink(self, name: str) -> None:
         if not self.rw:
-            raise fuse.FuseOSError(errno.EPERM)
+            _raise_shared(_EPERM)
 
-        del self.contents[name]
+        try:
+            del self.contents[name]
+        except KeyError:
+            raise fuse.FuseOSError(errno.ENOENT)
 
     async def rmdir(self, name: str) -> None:
         if not self.rw:
-            raise fuse.FuseOSError(errno.EPERM)
+            _raise_shared(_EPERM)
 
-        del self.contents[name]
+        try:
+            del self.contents[name]
+        except KeyError:
+            raise fuse.FuseOSError(errno.ENOENT)
 
     async def symlink(self, name: str, target: str) -> Node_Like:
         if not self.rw:
-            raise fuse.FuseOSError(errno.EPERM)
+            _raise_shared(_EPERM)
 
         new_link = Symlink(target)
         self.contents[name] = new_link
 
     async def rename(self, old_name: str, new_parent: Node, new_name: str) -> None:
         if not isinstance(new_parent, DictDir):
-            raise fuse.FuseOSError(errno.ENOSYS)
+            _raise_shared(_ENOSYS)
 
         if not self.rw or not new_parent.rw:
-            raise fuse.FuseOSError(errno.EPERM)
+            _raise_shared(_EPERM)
 
-        node = self.contents[name]
-        del self.contents[name]
-        new_parent.contents[name] = node
+        node = self.contents.pop(old_name, None)
+        if node is None:
+            raise fuse.FuseOSError(errno.ENOENT)
+        new_parent.contents[new_name] = node
 
     async def link(self, name: str, node: Node) -> Node_Like:
         self.contents[name] = node
+
+
+class FrozenDictDir(BaseDir):
+    # Read-only directory for large, generated trees: Names and nodes are kept in
+    # parallel lists, which are cheaper to list than a dict, and `_index` is only used for lookups
+    __slots__ = ('_names', '_nodes', '_index')
+
+    def __init__(self, contents: Dict[str, Node_Like], mode: int = 0o555) -> None:
+        super().__init__(mode)
+        self._names = list(contents.keys())
+        self._nodes = list(contents.values())
+        self._index = {name: i for i, name in enumerate(self._names)}
+
+    @property
+    def negative_timeout(self):
+        return self.entry_timeout
+
+    async def lookup(self, name: str) -> Node_Like:
+        i = self._index.get(name, None)
+        return None if i is None else self._nodes[i]
+
+    async def opendir(self) -> DirHandle_Like:
+        return FrozenDictDir.Handle(self)
+
+    # ====== RW operations: Never allowed, like on a read-only DictDir ======
+
+    async def mknod(self, name: str, mode: int, dev: int) -> Node_Like:
+        _raise_shared(_EPERM)
+
+    async def mkdir(self, name: str, mode: int) -> Node_Like:
+        _raise_shared(_EPERM)
+
+    async def unlink(self, name: str) -> None:
+        _raise_shared(_EPERM)
+
+    async def rmdir(self, name: str) -> None:
+        _raise_shared(_EPERM)
+
+    async def symlink(self, name: str, target: str) -> Node_Like:
+        _raise_shared(_EPERM)
+
+    async def rename(self, old_name: str, new_parent: Node, new_name: str) -> None:
+        _raise_shared(_EPERM)
+
+    async def link(self, name: str, node: Node) -> Node_Like:
+        _raise_shared(_EPERM)
+
+    class Handle(DirHandle):
+        __slots__ = ()
+
+        supports_readdirplus = True
+
+        async def readdir(self) -> Iterable[DirEntry]:
+            for item in zip(self.node._names, self.node._nodes):
+                yield item
+
+        async def readdirplus(self) -> Iterable[Tuple[str, Node_Like, Optional[Stat_Like]]]:
+            for name, child in zip(self.node._names, self.node._nodes):
+                stat = await child.getattr() if isinstance(child, Node) else None
+                yield name, child, stat
@@ -21,9 +21,7 @@ class Stat(NamedTuple):
     st_birthtime: float = None
 
     def with_values(self, **kwargs):
-        values = self.as_dict()
-        values.update(kwargs)
-        return Stat(**values)
+        return self._replace(**kwargs)
 
     def as_dict(self) -> dict:
         return {
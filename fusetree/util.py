@@ -31,3 +31,15 @@ def is_iterable(x):
 
 def is_async_iterable(x):
       return hasattr(x, '__anext__') or hasattr(x, '__aiter__')
+
+
+def clear_exception(e):
+    """
+    Drop the traceback and chained exceptions of a handled exception.
+
+    Errors like ENOSYS are shared instances, and would otherwise keep the frames
+    of the request that raised them (and of whatever it was handling) alive
+    """
+    e.__traceback__ = None
+    e.__context__ = None
+    e.__cause__ = None